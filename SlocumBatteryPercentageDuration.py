@@ -10,18 +10,56 @@
 # Jan-2025, Pat Welch
 
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
 import json
 import logging
+import os
 from pathlib import Path
 import sys
+from typing import NamedTuple
 
+import netCDF4
 import numpy as np
 from scipy.stats import t
 from matplotlib import pyplot as plt
-import xarray as xr
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, see the "fast" extra
+    njit = None  # type: ignore[assignment]
+    prange = range
 
 S_PER_DAY = 86400  # seconds per day
-ONE_DAY = np.timedelta64(1, "D")
+NS_PER_DAY = S_PER_DAY * 1_000_000_000  # nanoseconds per day
+
+# Seconds per unit for CF "<unit> since <reference>" time units
+_UNIT_SECONDS = {
+    "days": 86400.0,
+    "day": 86400.0,
+    "d": 86400.0,
+    "hours": 3600.0,
+    "hour": 3600.0,
+    "h": 3600.0,
+    "minutes": 60.0,
+    "minute": 60.0,
+    "min": 60.0,
+    "seconds": 1.0,
+    "second": 1.0,
+    "sec": 1.0,
+    "s": 1.0,
+    "milliseconds": 1e-3,
+    "millisecond": 1e-3,
+    "ms": 1e-3,
+    "microseconds": 1e-6,
+    "microsecond": 1e-6,
+    "us": 1e-6,
+}
+
+
+# Smallest fit block, so tiny HDF5 chunks don't turn the fit into a Python loop
+_MIN_BLOCK_SIZE = 65536
 
 
 def _safe_sqrt(x):
@@ -31,6 +69,311 @@ def _safe_sqrt(x):
     return float(np.sqrt(max(0, x)))
 
 
+class LinearFit(NamedTuple):
+    """Least squares fit of y = intercept + slope * x."""
+
+    slope: float
+    intercept: float
+    var_slope: float
+    var_intercept: float
+    cov: float  # Cov(slope, intercept)
+    r_squared: float
+    n: int
+
+
+class Series(NamedTuple):
+    """Time window of one file, ready to fit."""
+
+    times: np.ndarray  # datetime64[ns]
+    values: np.ndarray
+    d_days: np.ndarray  # days since times[0]
+    block_size: int | None
+
+
+def _block_moments_numpy(x, y, n):
+    """Means and centered sums of squares of one block of each series.
+
+    x and y are (F, B) arrays with the n[f] samples of series f at the start
+    of row f and zeros after them. Returns (x_mean, y_mean, sxx, sxy, syy),
+    each of length F. The sums come from dot products of the raw values, so
+    no block-sized temporaries are allocated and the zero padding drops out.
+    """
+    sx = x.sum(axis=1)
+    sy = y.sum(axis=1)
+    x_mean = np.divide(sx, n, out=np.zeros_like(sx), where=n > 0)
+    y_mean = np.divide(sy, n, out=np.zeros_like(sy), where=n > 0)
+    sxx = np.einsum("ij,ij->i", x, x) - sx * x_mean
+    sxy = np.einsum("ij,ij->i", x, y) - sx * y_mean
+    syy = np.einsum("ij,ij->i", y, y) - sy * y_mean
+    return x_mean, y_mean, sxx, sxy, syy
+
+
+def _block_moments_loop(x, y, n):
+    """Single loop version of _block_moments_numpy, for compiling with numba.
+
+    The sums are taken about the first sample of each row, which keeps the
+    final centering well conditioned without a second pass. Rows are
+    independent, so numba spreads them across threads.
+    """
+    nrows = x.shape[0]
+    x_mean = np.zeros(nrows)
+    y_mean = np.zeros(nrows)
+    sxx = np.zeros(nrows)
+    sxy = np.zeros(nrows)
+    syy = np.zeros(nrows)
+    for f in prange(nrows):
+        m = n[f]
+        if m == 0:
+            continue
+        x0 = x[f, 0]
+        y0 = y[f, 0]
+        su = sv = suu = suv = svv = 0.0
+        for i in range(m):
+            u = x[f, i] - x0
+            v = y[f, i] - y0
+            su += u
+            sv += v
+            suu += u * u
+            suv += u * v
+            svv += v * v
+        mu = su / m
+        mv = sv / m
+        x_mean[f] = x0 + mu
+        y_mean[f] = y0 + mv
+        sxx[f] = suu - su * mu
+        sxy[f] = suv - su * mv
+        syy[f] = svv - sv * mv
+    return x_mean, y_mean, sxx, sxy, syy
+
+
+if njit is not None:
+    _block_moments = njit(cache=True, fastmath=True, parallel=True)(_block_moments_loop)
+else:
+    _block_moments = _block_moments_numpy
+
+
+class _RegressionMoments:
+    """Running means and centered sums of squares for straight-line fits.
+
+    One set of moments is kept per series. Blocks are merged with the
+    pairwise update of Chan, Golub & LeVeque, so the temporaries are the
+    size of one block however long the series are.
+    """
+
+    def __init__(self, nrows):
+        self.n = np.zeros(nrows, dtype=np.int64)
+        self.x_mean = np.zeros(nrows)
+        self.y_mean = np.zeros(nrows)
+        self.sxx = np.zeros(nrows)
+        self.sxy = np.zeros(nrows)
+        self.syy = np.zeros(nrows)
+
+    def update(self, x, y, n_block):
+        """Merge a zero padded (F, B) block holding n_block[f] samples per row."""
+        x_mean, y_mean, sxx, sxy, syy = _block_moments(x, y, n_block)
+
+        n = self.n + n_block
+        delta_x = x_mean - self.x_mean
+        delta_y = y_mean - self.y_mean
+        scale = n_block / np.maximum(n, 1)
+        weight = self.n * scale
+        self.sxx += sxx + delta_x * delta_x * weight
+        self.sxy += sxy + delta_x * delta_y * weight
+        self.syy += syy + delta_y * delta_y * weight
+        self.x_mean += delta_x * scale
+        self.y_mean += delta_y * scale
+        self.n = n
+
+    def fit(self):
+        """Least squares fit of each series from the accumulated moments."""
+        n = self.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = self.sxy / self.sxx
+            intercept = self.y_mean - slope * self.x_mean
+            sigma2 = np.maximum(self.syy - slope * self.sxy, 0.0) / (n - 2)  # residual variance
+            var_slope = sigma2 / self.sxx
+            var_intercept = sigma2 * (1 / n + self.x_mean**2 / self.sxx)
+            cov = -self.x_mean * sigma2 / self.sxx
+            r_squared = np.where(self.syy > 0, self.sxy**2 / (self.sxx * self.syy), np.nan)
+
+        return [
+            LinearFit(float(b), float(a), float(vb), float(va), float(c), float(r2), int(m))
+            for b, a, vb, va, c, r2, m in zip(
+                slope, intercept, var_slope, var_intercept, cov, r_squared, n
+            )
+        ]
+
+
+def _fit_batch(xs, ys, block_size=None):
+    """Straight-line least squares fits of every ys[f] against xs[f] at once.
+
+    Equivalent to np.polyfit(x, y, 1, cov=True) on each series, without
+    building Vandermonde matrices and calling lstsq. The series are stacked
+    into zero padded (F, N) arrays, which are consumed block_size columns at
+    a time, all at once if block_size is None.
+    """
+    n = np.array([x.size for x in xs], dtype=np.int64)
+    width = int(n.max(initial=0))
+    x_all = np.zeros((n.size, width))
+    y_all = np.zeros((n.size, width))
+    for f, (x, y) in enumerate(zip(xs, ys)):
+        x_all[f, : x.size] = x
+        y_all[f, : y.size] = y
+
+    moments = _RegressionMoments(n.size)
+    step = block_size or max(width, 1)
+    for start in range(0, width, step):
+        stop = start + step
+        moments.update(x_all[:, start:stop], y_all[:, start:stop], np.clip(n - start, 0, step))
+    return moments.fit()
+
+
+def _linear_fit(x, y, block_size=None):
+    """Straight-line least squares fit of a single series, see _fit_batch."""
+    return _fit_batch([x], [y], block_size)[0]
+
+
+def _block_size(var):
+    """Samples per fit block, a whole number of var's on-disk chunks.
+
+    Returns None for contiguous storage so the fit runs as a single block.
+    """
+    chunks = var.chunking()
+    if not isinstance(chunks, list):
+        return None
+    chunk = max(int(chunks[0]), 1)
+    return -(-_MIN_BLOCK_SIZE // chunk) * chunk
+
+
+def _decode_time(values, units, calendar):
+    """Convert raw time values to datetime64[ns].
+
+    CF "<unit> since <reference>" units are honored, otherwise the values
+    are assumed to be posixtime seconds.
+    """
+    if "since" in units:
+        unit = units.split("since", 1)[0].strip().lower()
+        scale = _UNIT_SECONDS[unit]
+        origin = np.datetime64(
+            netCDF4.num2date(
+                0,
+                units,
+                calendar,
+                only_use_cftime_datetimes=False,
+                only_use_python_datetimes=True,
+            ),
+            "ns",
+        )
+    else:
+        scale = 1.0
+        origin = np.datetime64(0, "ns")
+    return origin + np.round(values * (scale * 1e9)).astype("timedelta64[ns]")
+
+
+def _read_values(var):
+    """Read a netCDF variable as float64 with CF fill values and packing applied.
+
+    netCDF4's automatic mask-and-scale builds a masked array for every read;
+    substituting NaN for the fill values by hand is much cheaper.
+    """
+    var.set_auto_maskandscale(False)
+    values = np.array(var[:], dtype=np.float64)
+    for name in ("_FillValue", "missing_value"):
+        fill = getattr(var, name, None)
+        if fill is not None:
+            values[np.isin(values, np.ravel(fill).astype(np.float64))] = np.nan
+    scale_factor = getattr(var, "scale_factor", None)
+    if scale_factor is not None:
+        values *= scale_factor
+    add_offset = getattr(var, "add_offset", None)
+    if add_offset is not None:
+        values += add_offset
+    return values
+
+
+def _read_series(fn, time_name, sensor_name):
+    """Read the time and sensor variables from fn as plain NumPy arrays.
+
+    Rows with a missing time or sensor value are dropped, and the remaining
+    rows are sorted by time keeping the first of any duplicated times.
+    Returns None if either variable is missing.
+    """
+    with netCDF4.Dataset(fn) as nc:
+        missing = [name for name in (time_name, sensor_name) if name not in nc.variables]
+        if missing:
+            for name in missing:
+                logging.error("%s variable not present in %s", name, fn)
+            return None
+
+        tvar = nc.variables[time_name]
+        times = _read_values(tvar)
+        units = getattr(tvar, "units", "")
+        calendar = getattr(tvar, "calendar", "standard")
+        svar = nc.variables[sensor_name]
+        values = _read_values(svar)
+        block_size = _block_size(svar)
+
+    # Drop rows where either the time or the sensor is missing
+    mask = np.isfinite(times)
+    mask &= np.isfinite(values)
+    times, values = times[mask], values[mask]
+
+    # np.unique sorts and returns the index of the first occurrence of each time
+    times, first = np.unique(times, return_index=True)
+    values = values[first]
+
+    return _decode_time(times, units, calendar), values, block_size
+
+
+def _load_series(fn, args):
+    """Read fn and trim it to the requested time window.
+
+    Returns a Series, or None if fn can not be fit.
+    """
+    series = _read_series(fn, args.time, args.sensor)
+    if series is None:
+        return None
+    times, values, block_size = series
+
+    if args.start is not None or args.stop is not None:
+        lo = (
+            np.searchsorted(times, np.datetime64(args.start, "ns"), side="left")
+            if args.start is not None
+            else 0
+        )
+        hi = (
+            np.searchsorted(times, np.datetime64(args.stop, "ns"), side="right")
+            if args.stop is not None
+            else times.size
+        )
+        times, values = times[lo:hi], values[lo:hi]
+    elif args.ndays is not None and times.size:
+        stime = times[-1] - np.timedelta64(int(args.ndays * S_PER_DAY), "s")
+        lo = np.searchsorted(times, stime, side="left")
+        times, values = times[lo:], values[lo:]
+
+    if times.size < 3:
+        logging.error("Not enough data to fit in %s (%d points, need >= 3)", fn, times.size)
+        return None
+
+    # Days since the first sample, computed on the int64 nanoseconds in
+    # a single float64 buffer rather than via timedelta64 arithmetic
+    t_ns = times.view(np.int64)
+    d_days = np.subtract(t_ns, t_ns[0], dtype=np.float64)
+    d_days *= 1.0 / NS_PER_DAY
+
+    return Series(times, values, d_days, block_size)
+
+
+def _load_file(fn, args):
+    """_load_series that logs and swallows read errors, for worker processes."""
+    try:
+        return _load_series(fn, args)
+    except Exception as e:
+        logging.error("Failed to read %s: %s", fn, e)
+        return None
+
+
 def main(argv=None):
     parser = ArgumentParser(
         description="Slocum recover by estimates",
@@ -87,10 +430,27 @@ set the start/end times appropriately.
     alpha = 1 - args.confidence
     ci_pct = f"{args.confidence * 100:g}"
 
-    logging.basicConfig(
-        level=logging.DEBUG if args.verbose else logging.INFO,
-        format="%(asctime)s %(levelname)s: %(message)s",
-    )
+    log_config = {
+        "level": logging.DEBUG if args.verbose else logging.INFO,
+        "format": "%(asctime)s %(levelname)s: %(message)s",
+    }
+    logging.basicConfig(**log_config)
+
+    # Files are independent, so read several in parallel worker processes
+    if len(args.filename) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(len(args.filename), os.cpu_count() or 1),
+            initializer=partial(logging.basicConfig, **log_config),
+        ) as executor:
+            series_list = list(executor.map(_load_file, args.filename, repeat(args)))
+    else:
+        series_list = [_load_file(args.filename[0], args)]
+
+    loaded = [
+        (index, fn, series)
+        for index, (fn, series) in enumerate(zip(args.filename, series_list))
+        if series is not None
+    ]
 
     if args.plot or args.output:
         fig, axs = plt.subplots(len(args.filename), 1, sharex=True, squeeze=False)
@@ -100,174 +460,123 @@ set the start/end times appropriately.
     results = []
     plotted_indices = set()
 
-    for index, fn in enumerate(args.filename):
-        try:
-            with xr.open_dataset(fn) as ds:
-                var_names = (args.time, args.sensor)
-                missing = [name for name in var_names if name not in ds]
-                if missing:
-                    for name in missing:
-                        logging.error("%s variable not present in %s", name, fn)
-                    continue
-
-                ds = ds.drop_vars(set(ds) - set(var_names))
-
-                if ds[args.time].dtype.kind == "f":
-                    # Assume posixtime
-                    for name in ds.dims:
-                        logging.debug("Processing dimension: %s", name)
-                        ds[name] = ds[args.time].astype("datetime64[s]")
-                        if name != "time":
-                            ds = ds.rename_dims({name: "time"})
-                            ds = ds.rename({name: "time"})
-                        break
-
-                ds = ds.drop_duplicates("time", keep="first")
-                ds = ds.sel(time=ds.time[np.logical_not(ds[args.sensor].isnull())])
-                ds = ds.sortby("time")
-
-                if args.start is not None or args.stop is not None:
-                    stime = np.datetime64(args.start) if args.start is not None else ds.time[0]
-                    etime = np.datetime64(args.stop) if args.stop is not None else ds.time[-1]
-                    ds = ds.sel(time=slice(stime, etime))
-                elif args.ndays is not None:
-                    etime = ds.time[-1]
-                    stime = etime - np.timedelta64(int(args.ndays * S_PER_DAY), "s")
-                    ds = ds.sel(time=slice(stime, etime))
-
-                if ds.time.size < 3:
-                    logging.error(
-                        "Not enough data to fit in %s (%d points, need >= 3)", fn, ds.time.size
-                    )
-                    continue
-
-                ds["dDays"] = ("time", (ds.time.data - ds.time.data[0]) / ONE_DAY)
-
-                # Linear fit: sensor = intercept + slope * dDays
-                coeffs, cov = np.polyfit(ds.dDays, ds[args.sensor], 1, cov=True)
-                slope, intercept = coeffs
-                # cov[0,0]=Var(slope), cov[1,1]=Var(intercept), cov[0,1]=Cov(slope, intercept)
-
-                if abs(slope) < 1e-10:
-                    logging.error("Near-zero slope in %s — cannot estimate recovery date", fn)
-                    continue
-
-                d_recovery = (args.threshold - intercept) / slope
-                t_recover_by = ds.time[0].data + np.timedelta64(round(d_recovery * S_PER_DAY), "s")
-                t_recover_by = t_recover_by.astype("datetime64[s]")
-
-                if d_recovery < 0:
-                    logging.warning(
-                        "Recovery date is in the past for %s "
-                        "(positive slope — battery increasing?)",
-                        fn,
-                    )
-
-                # Validate covariance matrix
-                if not np.all(np.isfinite(cov)):
-                    logging.warning(
-                        "Unstable fit for %s — confidence intervals may be unreliable", fn
-                    )
-
-                # Propagate uncertainty including covariance between slope and intercept
-                # d_recovery = (threshold - intercept) / slope
-                # ∂d/∂intercept = -1/slope, ∂d/∂slope = -d_recovery/slope
-                var_recovery = (
-                    cov[1, 1] + d_recovery**2 * cov[0, 0] + 2 * d_recovery * cov[0, 1]
-                ) / slope**2
-                sigma_recovery = _safe_sqrt(var_recovery)
-
-                sigma_intercept = _safe_sqrt(cov[1, 1])
-                sigma_slope = _safe_sqrt(cov[0, 0])
-
-                # R-squared
-                y_pred = intercept + slope * ds.dDays
-                ss_res = np.sum((ds[args.sensor] - y_pred) ** 2).item()
-                ss_tot = np.sum((ds[args.sensor] - ds[args.sensor].mean()) ** 2).item()
-                if ss_tot == 0:
-                    r_squared = float("nan")
-                    logging.warning("Constant sensor values in %s — R² undefined", fn)
-                else:
-                    r_squared = 1 - ss_res / ss_tot
-
-                # p-value for slope
-                n = ds.dDays.size
-                df = n - 2
-                if sigma_slope > 0:
-                    t_stat = slope / sigma_slope
-                    pvalue = 2 * (1 - t.cdf(abs(t_stat), df))
-                else:
-                    pvalue = float("nan")
-
-                # Confidence intervals
-                ts = abs(t.ppf(alpha / 2, df))
-                ci_intercept = sigma_intercept * ts
-                ci_slope = sigma_slope * ts
-                ci_recovery = sigma_recovery * ts
-
-                if not args.json_output:
-                    print(f"\n{fn}")
-                    print(f"Sensor:            {args.sensor}")
-                    print(f"Sensor threshold:  {args.threshold}")
-                    print(f"Intercept ({ci_pct}%):   {intercept:.4f}+-{ci_intercept:.4f}")
-                    print(f"Slope ({ci_pct}%, /day):  {slope:.4f}+-{ci_slope:.4f}")
-                    print(f"R-squared:         {r_squared:.4f}")
-                    print(f"Pvalue:            {pvalue:.4f}")
-                    print(f"Recovery By ({ci_pct}%): {t_recover_by}+-{ci_recovery:.2f} (days)")
-
-                results.append(
-                    {
-                        "file": fn,
-                        "sensor": args.sensor,
-                        "threshold": args.threshold,
-                        "confidence": args.confidence,
-                        "n_points": int(n),
-                        "intercept": float(intercept),
-                        "intercept_ci": float(ci_intercept) if np.isfinite(ci_intercept) else None,
-                        "slope": float(slope),
-                        "slope_ci": float(ci_slope) if np.isfinite(ci_slope) else None,
-                        "r_squared": float(r_squared) if np.isfinite(r_squared) else None,
-                        "pvalue": float(pvalue) if np.isfinite(pvalue) else None,
-                        "recovery_date": str(t_recover_by),
-                        "recovery_ci_days": float(ci_recovery)
-                        if np.isfinite(ci_recovery)
-                        else None,
-                    }
-                )
+    # Fit every file in one batch: sensor = intercept + slope * d_days
+    block_sizes = [s.block_size for _, _, s in loaded if s.block_size is not None]
+    fits = _fit_batch(
+        [s.d_days for _, _, s in loaded],
+        [s.values for _, _, s in loaded],
+        min(block_sizes, default=None),
+    )
+
+    for (index, fn, series), fit in zip(loaded, fits):
+        times, values, d_days = series.times, series.values, series.d_days
+        slope, intercept = fit.slope, fit.intercept
 
-                success = True
-
-                if args.plot or args.output:
-                    abs_slope = abs(slope)
-                    input_title = Path(fn).name
-                    if slope < 0:
-                        fit_title = f"{intercept:.1f}-{abs_slope:.2f} * days"
-                    else:
-                        fit_title = f"{intercept:.1f}+{abs_slope:.2f} * days"
-                    fit_title += f"\nRecovery by {t_recover_by}"
-                    ax = axs[index, 0]
-                    plotted_indices.add(index)
-                    logging.debug("Plotting: ax=%s, axs type=%s", ax, type(axs))
-                    ax.plot(ds.time, ds[args.sensor], "o", label=input_title)
-                    ax.plot(ds.time, intercept + slope * ds.dDays, "r", label=fit_title)
-                    # Extend fit line to recovery date
-                    if t_recover_by > ds.time[-1].values:
-                        last_fit_val = float(intercept + slope * ds.dDays[-1].item())
-                        ax.plot(
-                            [ds.time[-1].values, t_recover_by],
-                            [last_fit_val, args.threshold],
-                            "r--",
-                            alpha=0.5,
-                        )
-                    ax.axhline(y=args.threshold, color="gray", linestyle="--", alpha=0.5)
-                    ax.set_ylabel(args.sensor)
-                    ax.legend()
-                    ax.grid()
-
-        except Exception as e:
-            logging.error("Failed to read %s: %s", fn, e)
+        if abs(slope) < 1e-10:
+            logging.error("Near-zero slope in %s — cannot estimate recovery date", fn)
             continue
 
+        d_recovery = (args.threshold - intercept) / slope
+        t_recover_by = times[0] + np.timedelta64(round(d_recovery * S_PER_DAY), "s")
+        t_recover_by = t_recover_by.astype("datetime64[s]")
+
+        if d_recovery < 0:
+            logging.warning(
+                "Recovery date is in the past for %s (positive slope — battery increasing?)",
+                fn,
+            )
+
+        # Validate covariance matrix
+        if not np.all(np.isfinite([fit.var_slope, fit.var_intercept, fit.cov])):
+            logging.warning("Unstable fit for %s — confidence intervals may be unreliable", fn)
+
+        # Propagate uncertainty including covariance between slope and intercept
+        # d_recovery = (threshold - intercept) / slope
+        # ∂d/∂intercept = -1/slope, ∂d/∂slope = -d_recovery/slope
+        var_recovery = (
+            fit.var_intercept + d_recovery**2 * fit.var_slope + 2 * d_recovery * fit.cov
+        ) / slope**2
+        sigma_recovery = _safe_sqrt(var_recovery)
+
+        sigma_intercept = _safe_sqrt(fit.var_intercept)
+        sigma_slope = _safe_sqrt(fit.var_slope)
+
+        r_squared = fit.r_squared
+        if np.isnan(r_squared):
+            logging.warning("Constant sensor values in %s — R² undefined", fn)
+
+        # p-value for slope
+        n = fit.n
+        df = n - 2
+        if sigma_slope > 0:
+            t_stat = slope / sigma_slope
+            pvalue = 2 * (1 - t.cdf(abs(t_stat), df))
+        else:
+            pvalue = float("nan")
+
+        # Confidence intervals
+        ts = abs(t.ppf(alpha / 2, df))
+        ci_intercept = sigma_intercept * ts
+        ci_slope = sigma_slope * ts
+        ci_recovery = sigma_recovery * ts
+
+        if not args.json_output:
+            print(f"\n{fn}")
+            print(f"Sensor:            {args.sensor}")
+            print(f"Sensor threshold:  {args.threshold}")
+            print(f"Intercept ({ci_pct}%):   {intercept:.4f}+-{ci_intercept:.4f}")
+            print(f"Slope ({ci_pct}%, /day):  {slope:.4f}+-{ci_slope:.4f}")
+            print(f"R-squared:         {r_squared:.4f}")
+            print(f"Pvalue:            {pvalue:.4f}")
+            print(f"Recovery By ({ci_pct}%): {t_recover_by}+-{ci_recovery:.2f} (days)")
+
+        results.append(
+            {
+                "file": fn,
+                "sensor": args.sensor,
+                "threshold": args.threshold,
+                "confidence": args.confidence,
+                "n_points": int(n),
+                "intercept": float(intercept),
+                "intercept_ci": float(ci_intercept) if np.isfinite(ci_intercept) else None,
+                "slope": float(slope),
+                "slope_ci": float(ci_slope) if np.isfinite(ci_slope) else None,
+                "r_squared": float(r_squared) if np.isfinite(r_squared) else None,
+                "pvalue": float(pvalue) if np.isfinite(pvalue) else None,
+                "recovery_date": str(t_recover_by),
+                "recovery_ci_days": float(ci_recovery) if np.isfinite(ci_recovery) else None,
+            }
+        )
+
+        success = True
+
+        if args.plot or args.output:
+            abs_slope = abs(slope)
+            input_title = Path(fn).name
+            if slope < 0:
+                fit_title = f"{intercept:.1f}-{abs_slope:.2f} * days"
+            else:
+                fit_title = f"{intercept:.1f}+{abs_slope:.2f} * days"
+            fit_title += f"\nRecovery by {t_recover_by}"
+            ax = axs[index, 0]
+            plotted_indices.add(index)
+            logging.debug("Plotting: ax=%s, axs type=%s", ax, type(axs))
+            ax.plot(times, values, "o", label=input_title)
+            ax.plot(times, intercept + slope * d_days, "r", label=fit_title)
+            # Extend fit line to recovery date
+            if t_recover_by > times[-1]:
+                last_fit_val = float(intercept + slope * d_days[-1])
+                ax.plot(
+                    [times[-1], t_recover_by],
+                    [last_fit_val, args.threshold],
+                    "r--",
+                    alpha=0.5,
+                )
+            ax.axhline(y=args.threshold, color="gray", linestyle="--", alpha=0.5)
+            ax.set_ylabel(args.sensor)
+            ax.legend()
+            ax.grid()
+
     if args.json_output:
         print(json.dumps(results, indent=2))
 
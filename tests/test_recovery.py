@@ -4,7 +4,14 @@ import numpy as np
 import pytest
 import xarray as xr
 
-from SlocumBatteryPercentageDuration import main
+from SlocumBatteryPercentageDuration import (
+    _block_moments,
+    _block_moments_loop,
+    _block_moments_numpy,
+    _fit_batch,
+    _linear_fit,
+    main,
+)
 
 
 def make_linear_nc(path, start="2025-01-01", n_days=51, batt_start=100.0, batt_end=50.0):
@@ -256,3 +263,155 @@ def test_custom_confidence(tmp_path, capsys):
     assert "Intercept (99%):" in out
     assert "Slope (99%, /day):" in out
     assert "Recovery By (99%):" in out
+
+
+def test_packed_sensor(tmp_path, capsys):
+    """Packed sensor data should be unpacked and fill values dropped."""
+    nc = tmp_path / "test.nc"
+    times = np.datetime64("2025-01-01") + np.arange(51).astype("timedelta64[D]")
+    battery = np.linspace(100, 50, 51)
+    battery[5] = np.nan
+    ds = xr.Dataset(
+        {"m_lithium_battery_relative_charge": ("time", battery)},
+        coords={"time": times},
+    )
+    ds.to_netcdf(
+        nc,
+        encoding={
+            "m_lithium_battery_relative_charge": {
+                "dtype": "int16",
+                "scale_factor": 0.01,
+                "add_offset": 50.0,
+                "_FillValue": -32767,
+            }
+        },
+    )
+
+    rc = main(["--json", "--threshold", "15", str(nc)])
+    assert rc == 0
+
+    r = json.loads(capsys.readouterr().out)[0]
+    assert r["n_points"] == 50
+    assert r["slope"] == pytest.approx(-1.0, abs=1e-3)
+    assert "2025-03-27" in r["recovery_date"]
+
+
+def test_unsorted_duplicate_times(tmp_path, capsys):
+    """Out-of-order times should be sorted and the first of any duplicate kept."""
+    nc = tmp_path / "test.nc"
+    times = np.datetime64("2025-01-01") + np.arange(51).astype("timedelta64[D]")
+    battery = np.linspace(100, 50, 51)
+    # Reverse the order, then repeat a few times with bogus values
+    times = np.concatenate([times[::-1], times[[3, 17, 40]]])
+    battery = np.concatenate([battery[::-1], [0.0, 0.0, 0.0]])
+    ds = xr.Dataset(
+        {"m_lithium_battery_relative_charge": ("time", battery)},
+        coords={"time": times},
+    )
+    ds.to_netcdf(nc)
+
+    rc = main(["--json", "--threshold", "15", str(nc)])
+    assert rc == 0
+
+    r = json.loads(capsys.readouterr().out)[0]
+    assert r["n_points"] == 51
+    assert r["r_squared"] == pytest.approx(1.0)
+    assert "2025-03-27" in r["recovery_date"]
+
+
+def test_linear_fit_matches_polyfit():
+    """The closed-form fit should agree with np.polyfit(..., cov=True)."""
+    rng = np.random.default_rng(1234)
+    x = np.sort(rng.uniform(0, 30, 200))
+    y = 95.0 - 0.8 * x + rng.normal(0, 0.5, x.size)
+
+    coeffs, cov = np.polyfit(x, y, 1, cov=True)
+    fit = _linear_fit(x, y)
+
+    assert fit.slope == pytest.approx(coeffs[0])
+    assert fit.intercept == pytest.approx(coeffs[1])
+    assert fit.var_slope == pytest.approx(cov[0, 0])
+    assert fit.var_intercept == pytest.approx(cov[1, 1])
+    assert fit.cov == pytest.approx(cov[0, 1])
+    assert fit.r_squared == pytest.approx(np.corrcoef(x, y)[0, 1] ** 2)
+    assert fit.n == x.size
+
+
+def test_linear_fit_blocks():
+    """Merging moments block by block should match a single-block fit."""
+    rng = np.random.default_rng(5678)
+    x = np.sort(rng.uniform(0, 30, 1000))
+    y = 90.0 - 1.2 * x + rng.normal(0, 0.3, x.size)
+
+    whole = _linear_fit(x, y)
+    blocked = _linear_fit(x, y, block_size=64)
+
+    for name in whole._fields:
+        assert getattr(blocked, name) == pytest.approx(getattr(whole, name))
+
+
+def test_block_moments_kernels_agree():
+    """The single-loop and NumPy block moment kernels should agree."""
+    rng = np.random.default_rng(91011)
+    x = np.zeros((3, 500))
+    y = np.zeros((3, 500))
+    n = np.array([500, 120, 0])
+    for f, m in enumerate(n):
+        x[f, :m] = np.sort(rng.uniform(0, 30, m))
+        y[f, :m] = 80.0 - 0.5 * x[f, :m] + rng.normal(0, 0.2, m)
+
+    expected = _block_moments_numpy(x, y, n)
+    for kernel in (_block_moments_loop, _block_moments):
+        for got, want in zip(kernel(x, y, n), expected):
+            np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-9)
+
+
+def test_fit_batch_matches_single():
+    """Fitting several series at once should match fitting each on its own."""
+    rng = np.random.default_rng(121314)
+    xs, ys = [], []
+    for m, slope in ((40, -1.0), (300, -0.3), (3, -2.0)):
+        x = np.sort(rng.uniform(0, 20, m))
+        xs.append(x)
+        ys.append(95.0 + slope * x + rng.normal(0, 0.1, m))
+
+    batch = _fit_batch(xs, ys, block_size=32)
+    assert len(batch) == len(xs)
+    for x, y, fit in zip(xs, ys, batch):
+        single = _linear_fit(x, y)
+        for name in single._fields:
+            assert getattr(fit, name) == pytest.approx(getattr(single, name))
+
+
+def test_multiple_files_with_failure(tmp_path, capsys):
+    """A bad file among several should be skipped and the rest kept in order."""
+    nc1 = tmp_path / "a.nc"
+    nc2 = tmp_path / "c.nc"
+    make_linear_nc(nc1)
+    make_linear_nc(nc2, batt_start=90, batt_end=45)
+
+    rc = main(["--json", "--threshold", "15", str(nc1), str(tmp_path / "b.nc"), str(nc2)])
+    assert rc == 0
+
+    data = json.loads(capsys.readouterr().out)
+    assert [r["file"] for r in data] == [str(nc1), str(nc2)]
+
+
+def test_missing_times(tmp_path, capsys):
+    """Rows with a missing time should be dropped before fitting."""
+    nc = tmp_path / "test.nc"
+    epoch_start = int(
+        (np.datetime64("2025-01-01") - np.datetime64("1970-01-01")) / np.timedelta64(1, "s")
+    )
+    times = epoch_start + np.arange(51, dtype=np.float64) * 86400
+    times[[7, 50]] = np.nan
+    battery = np.linspace(100, 50, 51)
+    ds = xr.Dataset({"m_lithium_battery_relative_charge": ("obs", battery), "time": ("obs", times)})
+    ds.to_netcdf(nc)
+
+    rc = main(["--json", "--ndays", "60", "--threshold", "15", str(nc)])
+    assert rc == 0
+
+    r = json.loads(capsys.readouterr().out)[0]
+    assert r["n_points"] == 49
+    assert "2025-03-27" in r["recovery_date"]